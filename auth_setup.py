@@ -2,8 +2,9 @@
 """One-time interactive login to save Amazon Kindle session state.
 
 Launches a visible browser so you can log into Amazon manually
-(handles 2FA, CAPTCHA, etc.). After login, saves the browser
-session to state/kindle_session.json for headless reuse.
+(handles 2FA, CAPTCHA, etc.). The browser runs on a persistent
+profile in state/chromium-profile/, so the login cookies are kept
+there for kindle_exporter.py to reuse headlessly.
 
 Re-run this script whenever the session expires.
 """
@@ -14,7 +15,7 @@ from playwright.sync_api import sync_playwright
 
 PROJECT_DIR = Path(__file__).resolve().parent
 STATE_DIR = PROJECT_DIR / "state"
-SESSION_FILE = STATE_DIR / "kindle_session.json"
+PROFILE_DIR = STATE_DIR / "chromium-profile"
 NOTEBOOK_URL = "https://read.amazon.com/notebook"
 
 
@@ -32,9 +33,8 @@ def main():
         launch_opts = {"headless": False}
         if args.chrome:
             launch_opts["channel"] = "chrome"
-        browser = p.chromium.launch(**launch_opts)
-        context = browser.new_context()
-        page = context.new_page()
+        context = p.chromium.launch_persistent_context(str(PROFILE_DIR), **launch_opts)
+        page = context.pages[0] if context.pages else context.new_page()
 
         page.goto(NOTEBOOK_URL)
 
@@ -42,10 +42,8 @@ def main():
         print("After you see your Kindle notebook page, press Enter here to save the session.")
         input("\nPress Enter when logged in and notebook page is visible... ")
 
-        context.storage_state(path=str(SESSION_FILE))
-        print(f"Session saved to {SESSION_FILE}")
-
-        browser.close()
+        context.close()
+        print(f"Session saved to {PROFILE_DIR}")
 
 
 if __name__ == "__main__":
@@ -1,106 +1,127 @@
 #!/usr/bin/env python3
 """Export Kindle highlights/notes from read.amazon.com/notebook.
 
-Loads a saved browser session, scrapes all books and their
-highlights/notes, and writes per-book markdown files to notes/.
+Reuses the browser profile saved by auth_setup.py, scrapes all books
+and their highlights/notes, and writes per-book markdown files to notes/.
 
 Usage:
-    python kindle_exporter.py           # incremental (skip existing files)
-    python kindle_exporter.py --force   # re-export all books
+    python kindle_exporter.py               # incremental (skip exported books)
+    python kindle_exporter.py --force       # re-export all books
+    python kindle_exporter.py --workers 8   # scrape 8 books concurrently
 """
 
 import argparse
+import asyncio
+import json
+import os
 import re
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from playwright.sync_api import sync_playwright
+from typing import Optional
+from urllib.parse import urlencode, urlsplit
+from playwright.async_api import async_playwright
+from selectolax.lexbor import LexborHTMLParser
 
 PROJECT_DIR = Path(__file__).resolve().parent
 STATE_DIR = PROJECT_DIR / "state"
-SESSION_FILE = STATE_DIR / "kindle_session.json"
+PROFILE_DIR = STATE_DIR / "chromium-profile"
+EXPORTED_INDEX_FILE = STATE_DIR / "exported.json"
+BOOKS_CACHE_FILE = STATE_DIR / "books.json"
 NOTES_DIR = PROJECT_DIR / "notes"
 NOTEBOOK_URL = "https://read.amazon.com/notebook"
+DEFAULT_WORKERS = 4
+MAX_ANNOTATION_PAGES = 200  # safety cap on pagination for a single book
+
+# Resources the scraper never reads; aborting them saves bandwidth and render time.
+# Stylesheets stay allowed: the annotations pane only scrolls (and lazy-loads)
+# with the page CSS applied.
+BLOCKED_RESOURCE_TYPES = {"image", "font", "media"}
+BLOCKED_HOSTS = ("amazon-adsystem.com", "assoc-amazon.com", "fls-na.amazon.com")
+
+_UNSAFE_RE = re.compile(r'[<>:"/\\|?*]')
+_BY_RE = re.compile(r'^By:\s*', re.IGNORECASE)
+
+# Used by _node_text to approximate innerText on parsed HTML
+_HIDDEN_SELECTOR = '[hidden], .aok-hidden, [style*="display:none"], [style*="display: none"]'
+_BLOCK_SELECTOR = "p, div, li, blockquote"
+_BLOCK_BREAK = "\x00"
+_LINE_BREAK = "\x01"
+_WHITESPACE_RE = re.compile(r'[ \t\r\n]+')
+_BLOCK_BREAK_RE = re.compile(r'(?: ?\x00 ?)+')
+_LINE_BREAK_RE = re.compile(r' ?\x01 ?')
 
 
 def sanitize_filename(name: str) -> str:
     """Remove or replace characters that are unsafe for filenames."""
-    name = re.sub(r'[<>:"/\\|?*]', '', name)
+    name = _UNSAFE_RE.sub('', name)
     name = name.strip('. ')
     return name[:200]  # cap length
 
 
-def extract_books(page) -> list[dict]:
+def book_url(asin: str) -> str:
+    """Return the notebook URL that opens a single book's annotations."""
+    return f"{NOTEBOOK_URL}?asin={asin}&contentLimitState=&"
+
+
+async def extract_books(page) -> list[dict]:
     """Extract the list of books from the sidebar."""
-    page.wait_for_selector(
+    await page.wait_for_selector(
         "#kp-notebook-library .kp-notebook-library-each-book",
         timeout=30000,
     )
-    book_els = page.query_selector_all(
-        "#kp-notebook-library .kp-notebook-library-each-book"
-    )
-    books = []
-    for el in book_els:
-        title_el = el.query_selector("h2")
-        author_el = el.query_selector("p")
-        title = title_el.inner_text().strip() if title_el else "Unknown Title"
-        author = author_el.inner_text().strip() if author_el else "Unknown Author"
+    # Walk the sidebar in a single evaluate instead of one round-trip per element.
+    # Each book's DOM id is its ASIN, which is all we need to open it later.
+    books = await page.evaluate("""() => Array.from(
+        document.querySelectorAll('#kp-notebook-library .kp-notebook-library-each-book')
+    ).map(el => ({
+        asin: el.id,
+        title: el.querySelector('h2')?.innerText.trim() || 'Unknown Title',
+        author: el.querySelector('p')?.innerText.trim() || 'Unknown Author',
+    }))""")
+    for book in books:
         # Clean "By: " prefix from author
-        author = re.sub(r'^By:\s*', '', author, flags=re.IGNORECASE)
-        books.append({"element": el, "title": title, "author": author})
+        book["author"] = _BY_RE.sub('', book["author"])
     return books
 
 
-def extract_highlights(page) -> list[dict]:
-    """Extract all highlights/notes for the currently selected book."""
-    # Wait for annotations to appear (or the empty state)
-    try:
-        page.wait_for_selector(
-            "#kp-notebook-annotations .a-row",
-            timeout=10000,
-        )
-    except Exception:
-        return []
+def _parse_header(header: str) -> tuple[str, str, str]:
+    """Split an annotation header into (color, page, location).
 
-    # Small delay to let all annotations render
-    time.sleep(1)
+    Headers look like "Yellow highlight | Location: 1234" or
+    "Yellow highlight | Page: 56, Location: 1,234".
+    """
+    color = ""
+    fields = {"page": "", "location": ""}
 
-    annotations = page.query_selector_all(
-        "#kp-notebook-annotations > .a-row.a-spacing-base"
-    )
+    head, _, rest = header.partition("|")
+    words = head.split()
+    if len(words) == 2 and words[1].lower() == "highlight" and words[0].isalpha():
+        color = words[0]
+
+    key = None
+    for part in rest.replace("|", ",").split(","):
+        name, sep, value = part.partition(":")
+        if sep:
+            key = name.strip().lower()
+            if key in fields:
+                fields[key] = value.strip()
+        elif key in fields and part.strip():
+            # Thousands separator inside a value, e.g. "Location: 1,234"
+            fields[key] += "," + part.strip()
+
+    return color, fields["page"], fields["location"]
 
+
+def _build_highlights(annotations: list[dict]) -> list[dict]:
+    """Turn raw {text, note, header} annotations into highlight dicts."""
     highlights = []
     for ann in annotations:
-        # Highlight text
-        hl_el = ann.query_selector("#highlight")
-        highlight_text = hl_el.inner_text().strip() if hl_el else ""
-
-        # Note text
-        note_el = ann.query_selector("#note")
-        note_text = note_el.inner_text().strip() if note_el else ""
-
-        # Header with color and location info
-        header_el = ann.query_selector("#annotationHighlightHeader")
-        if not header_el:
-            header_el = ann.query_selector("#annotationNoteHeader")
-        header_text = header_el.inner_text().strip() if header_el else ""
-
-        # Parse location and page from header like "Yellow highlight | Location: 1234"
-        # or "Yellow highlight | Page: 56, Location: 1234"
-        location = ""
-        page_num = ""
-        color = ""
-
-        loc_match = re.search(r'Location:\s*(\S+)', header_text, re.IGNORECASE)
-        if loc_match:
-            location = loc_match.group(1).rstrip(',')
-
-        page_match = re.search(r'Page:\s*(\S+)', header_text, re.IGNORECASE)
-        if page_match:
-            page_num = page_match.group(1).rstrip(',')
-
-        color_match = re.match(r'(\w+)\s+highlight', header_text, re.IGNORECASE)
-        if color_match:
-            color = color_match.group(1)
+        highlight_text = ann["text"]
+        note_text = ann["note"]
+        header_text = ann["header"]
+
+        color, page_num, location = _parse_header(header_text)
 
         if highlight_text or note_text:
             highlights.append({
@@ -114,131 +135,414 @@ def extract_highlights(page) -> list[dict]:
     return highlights
 
 
-def write_markdown(book_title: str, author: str, highlights: list[dict], output_dir: Path):
-    """Write a markdown file for a single book."""
-    filename = sanitize_filename(f"{book_title} - {author}") + ".md"
-    filepath = output_dir / filename
-
-    lines = [
-        f"# {book_title}",
-        f"**Author:** {author}",
-        "",
-        "---",
-        "",
+def _node_text(node) -> str:
+    """Return a node's text the way innerText renders it, or "" if missing.
+
+    Hidden descendants are dropped, whitespace runs in the source collapse to
+    one space, <br> becomes a newline and block elements start a new line.
+    Modifies the node in place.
+    """
+    if node is None:
+        return ""
+    for el in node.css(_HIDDEN_SELECTOR):
+        el.decompose()
+    for br in node.css("br"):
+        br.replace_with(_LINE_BREAK)
+    for block in node.css(_BLOCK_SELECTOR):
+        block.insert_before(_BLOCK_BREAK)
+        block.insert_after(_BLOCK_BREAK)
+    text = _WHITESPACE_RE.sub(" ", node.text())
+    text = _BLOCK_BREAK_RE.sub("\n", text)
+    return _LINE_BREAK_RE.sub("\n", text).strip()
+
+
+def parse_annotations(html: str) -> tuple[list[dict], str, str]:
+    """Parse a notebook HTML page or fragment.
+
+    Returns the highlights plus the (token, contentLimitState) pair needed to
+    request the next page of annotations; the token is empty on the last page.
+    Raises ValueError if the HTML has neither annotation rows nor the
+    empty-state marker, e.g. a sign-in or captcha page.
+    """
+    tree = LexborHTMLParser(html)
+    rows = tree.css("#kp-notebook-annotations > .a-row.a-spacing-base")
+    if not rows:
+        # The XHR response is a bare fragment without the container element
+        rows = tree.css("body > .a-row.a-spacing-base")
+    if not rows and tree.css_first(".no-annotations") is None:
+        raise ValueError("no annotations or empty-state marker in response")
+    annotations = [
+        {
+            "text": _node_text(row.css_first("#highlight")),
+            "note": _node_text(row.css_first("#note")),
+            "header": _node_text(
+                row.css_first("#annotationHighlightHeader, #annotationNoteHeader")
+            ),
+        }
+        for row in rows
     ]
 
-    for hl in highlights:
-        if hl["text"]:
-            lines.append(f"> {hl['text']}")
-            lines.append("")
+    token_el = tree.css_first(".kp-notebook-annotations-next-page-start")
+    state_el = tree.css_first(".kp-notebook-content-limit-state")
+    token = (token_el.attributes.get("value") or "") if token_el is not None else ""
+    state = (state_el.attributes.get("value") or "") if state_el is not None else ""
+    return _build_highlights(annotations), token, state
 
-        if hl["note"]:
-            lines.append(f"**Note:** {hl['note']}")
 
-        meta_parts = []
-        if hl["location"]:
-            meta_parts.append(f"**Location:** {hl['location']}")
-        if hl["page"]:
-            meta_parts.append(f"**Page:** {hl['page']}")
-        if meta_parts:
-            lines.append(" | ".join(meta_parts))
+def _next_page_url(asin: str, token: str, state: str) -> str:
+    """Return the notebook URL for the annotation page starting at token."""
+    return f"{NOTEBOOK_URL}?" + urlencode(
+        {"asin": asin, "token": token, "contentLimitState": state}
+    )
 
-        lines.append("")
-        lines.append("---")
-        lines.append("")
 
-    filepath.write_text("\n".join(lines), encoding="utf-8")
-    return filepath
+async def fetch_highlights(request, asin: str) -> list[dict]:
+    """Fetch a book's highlights over HTTP, following pagination tokens.
 
+    Uses the notebook's XHR endpoint with the context's cookies, so no page
+    has to be rendered. Raises RuntimeError if a response is not OK, is
+    redirected to sign-in, or pagination does not terminate, and ValueError
+    if a response does not look like annotations.
+    """
+    highlights = []
+    seen_tokens = set()
+    url = book_url(asin)
+    for _ in range(MAX_ANNOTATION_PAGES):
+        resp = await request.get(url, headers={"x-requested-with": "XMLHttpRequest"})
+        if not resp.ok:
+            raise RuntimeError(f"HTTP {resp.status} fetching {url}")
+        if "signin" in resp.url:
+            raise RuntimeError("redirected to sign-in")
+        page_highlights, token, state = parse_annotations(await resp.text())
+        highlights.extend(page_highlights)
+        if not token:
+            return highlights
+        if token in seen_tokens:
+            raise RuntimeError(f"pagination token {token!r} repeated")
+        seen_tokens.add(token)
+        url = _next_page_url(asin, token, state)
+    raise RuntimeError(f"more than {MAX_ANNOTATION_PAGES} pages of annotations")
+
+
+async def fetch_library_asins(request) -> Optional[list[str]]:
+    """Fetch the notebook over HTTP and return the sidebar ASINs in order.
+
+    Returns None if the request fails or is redirected to sign-in.
+    """
+    try:
+        resp = await request.get(NOTEBOOK_URL)
+    except Exception:
+        return None
+    if not resp.ok or "signin" in resp.url:
+        return None
+    tree = LexborHTMLParser(await resp.text())
+    return [
+        el.attributes.get("id") or ""
+        for el in tree.css("#kp-notebook-library .kp-notebook-library-each-book")
+    ]
 
-def existing_book_files(output_dir: Path) -> set[str]:
-    """Return set of existing markdown filenames (without extension) in output dir."""
-    return {f.stem for f in output_dir.glob("*.md")}
 
+async def extract_highlights(page) -> list[dict]:
+    """Extract all highlights/notes for the book loaded in page.
 
-def main():
-    parser = argparse.ArgumentParser(description="Export Kindle highlights to markdown")
-    parser.add_argument(
-        "--force", action="store_true",
-        help="Re-export all books (default: skip books that already have a file)",
-    )
-    parser.add_argument(
-        "--chrome", action="store_true",
-        help="Use system Chrome instead of Playwright's bundled Chromium",
+    Raises RuntimeError if the pane did not load every page of annotations.
+    """
+    # Wait for annotations to appear (or the empty state)
+    try:
+        await page.wait_for_selector(
+            "#kp-notebook-annotations .a-row",
+            timeout=10000,
+        )
+    except Exception:
+        return []
+
+    # Long books lazy-load annotations as the pane scrolls; keep scrolling it to
+    # the bottom until the height has stopped growing for a few ticks, for at
+    # most ~3 s. A partial load is caught by the next-page token below.
+    await page.evaluate("""async () => {
+        const el = document.querySelector('#kp-notebook-annotations-pane');
+        if (!el) return;
+        let last = -1;
+        let stable = 0;
+        for (let i = 0; i < 20 && stable < 3; i++) {
+            stable = el.scrollHeight === last ? stable + 1 : 0;
+            last = el.scrollHeight;
+            el.scrollTo(0, el.scrollHeight);
+            await new Promise(r => setTimeout(r, 150));
+        }
+    }""")
+
+    # Wait for the loading spinner to go away rather than sleeping
+    try:
+        await page.wait_for_function(
+            """() => {
+                const spinner = document.querySelector('#kp-notebook-annotations-loading-spinner');
+                return !spinner || spinner.hidden
+                    || spinner.classList.contains('aok-hidden')
+                    || spinner.style.display === 'none';
+            }""",
+            timeout=5000,
+        )
+    except Exception:
+        pass
+
+    # Parse a snapshot of the rendered page locally instead of querying the
+    # DOM over CDP. A remaining next-page token means scrolling stopped before
+    # everything loaded; fail rather than write a partial file.
+    highlights, token, _ = parse_annotations(await page.content())
+    if token:
+        raise RuntimeError("annotations only partially loaded")
+    return highlights
+
+
+def _highlight_template(has_text: bool, has_note: bool, has_meta: bool) -> str:
+    """Build the format template for one shape of highlight."""
+    return (
+        ("> {text}\n\n" if has_text else "")
+        + ("**Note:** {note}\n" if has_note else "")
+        + ("{meta}\n" if has_meta else "")
+        + "\n---\n"
     )
-    args = parser.parse_args()
 
-    if not SESSION_FILE.exists():
-        print(f"Session file not found: {SESSION_FILE}")
-        print("Run auth_setup.py first to log in and save your session.")
-        raise SystemExit(1)
 
-    NOTES_DIR.mkdir(exist_ok=True)
-    existing = existing_book_files(NOTES_DIR)
-
-    with sync_playwright() as p:
-        launch_opts = {"headless": True}
-        if args.chrome:
-            launch_opts["channel"] = "chrome"
-        browser = p.chromium.launch(**launch_opts)
-        context = browser.new_context(storage_state=str(SESSION_FILE))
-        page = context.new_page()
-
-        print("Navigating to Kindle notebook...")
-        page.goto(NOTEBOOK_URL, wait_until="networkidle")
-
-        # Check if we got redirected to login
-        if "signin" in page.url or "ap/signin" in page.url:
-            print("Session expired. Please re-run auth_setup.py to log in again.")
-            browser.close()
-            raise SystemExit(1)
-
-        books = extract_books(page)
-        print(f"Found {len(books)} books")
+# One prebuilt template per (has text, has note, has location/page) combination
+_HIGHLIGHT_TEMPLATES = {
+    (t, n, m): _highlight_template(t, n, m)
+    for t in (False, True) for n in (False, True) for m in (False, True)
+}
 
-        exported = 0
-        skipped = 0
 
-        for i, book in enumerate(books):
-            title = book["title"]
-            author = book["author"]
-            file_stem = sanitize_filename(f"{title} - {author}")
+def _render_highlight(hl: dict) -> str:
+    """Render one highlight as a markdown block ending in a "---" separator."""
+    location = hl["location"]
+    page = hl["page"]
+    if location and page:
+        meta = f"**Location:** {location} | **Page:** {page}"
+    elif location:
+        meta = f"**Location:** {location}"
+    elif page:
+        meta = f"**Page:** {page}"
+    else:
+        meta = ""
+
+    template = _HIGHLIGHT_TEMPLATES[bool(hl["text"]), bool(hl["note"]), bool(meta)]
+    return template.format_map(hl | {"meta": meta})
 
-            if not args.force and file_stem in existing:
-                skipped += 1
-                continue
 
-            print(f"  [{i+1}/{len(books)}] {title} by {author}...")
+def write_markdown(book_title: str, author: str, highlights: list[dict], output_dir: Path):
+    """Write a markdown file for a single book."""
+    filename = sanitize_filename(f"{book_title} - {author}") + ".md"
+    filepath = output_dir / filename
+
+    header = f"# {book_title}\n**Author:** {author}\n\n---\n"
+    body = "\n".join(_render_highlight(hl) for hl in highlights)
+    filepath.write_text(f"{header}\n{body}" if highlights else header, encoding="utf-8")
+    return filepath
+
+
+def load_exported_index(path: Path) -> dict[str, float]:
+    """Return the ASIN -> export timestamp index, or an empty one if missing."""
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def save_exported_index(index: dict[str, float], path: Path):
+    """Persist the ASIN -> export timestamp index.
+
+    Writes to a temp file and renames it into place, so an interrupted run
+    never leaves a truncated index behind.
+    """
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_text(json.dumps(index, indent=2, sort_keys=True), encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+def load_books_cache(path: Path) -> list[dict]:
+    """Return the book list saved by the last sidebar scan, or [] if missing."""
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (FileNotFoundError, json.JSONDecodeError):
+        return []
 
-            # Click the book to load its highlights
-            book["element"].click()
 
-            # Wait for content to update
+def save_books_cache(books: list[dict], path: Path):
+    """Persist the sidebar book list for the next run."""
+    path.write_text(json.dumps(books, indent=2), encoding="utf-8")
+
+
+async def _block_unneeded(route):
+    """Abort images, fonts, media and analytics beacons; let everything else through."""
+    request = route.request
+    host = urlsplit(request.url).hostname or ""
+    if request.resource_type in BLOCKED_RESOURCE_TYPES or host.endswith(BLOCKED_HOSTS):
+        await route.abort()
+    else:
+        await route.continue_()
+
+
+async def open_profile(p, chrome: bool = False):
+    """Open the persistent browser profile headlessly, with resource blocking."""
+    launch_opts = {"headless": True}
+    if chrome:
+        launch_opts["channel"] = "chrome"
+    context = await p.chromium.launch_persistent_context(str(PROFILE_DIR), **launch_opts)
+    await context.route("**/*", _block_unneeded)
+    return context
+
+
+async def export_worker(
+    context, queue: asyncio.Queue, total: int, counts: dict, exported_index: dict[str, float],
+    writer: ThreadPoolExecutor, index_writer: ThreadPoolExecutor,
+):
+    """Scrape and write books from the queue until it is empty.
+
+    Markdown files are written on writer; index saves go through the
+    single-threaded index_writer so snapshots land in order.
+    """
+    page = None
+    while True:
+        try:
+            i, book = queue.get_nowait()
+        except asyncio.QueueEmpty:
+            break
+
+        title = book["title"]
+        author = book["author"]
+        print(f"  [{i+1}/{total}] {title} by {author}...")
+
+        try:
+            highlights = await fetch_highlights(context.request, book["asin"])
+        except Exception as e:
+            # Fall back to rendering the book's notebook page
+            print(f"    {title}: direct fetch failed ({e}), loading page instead")
+            # Navigate straight to the book's notebook URL; the annotations are in
+            # the initial document, so there is no need to wait for the full load.
             try:
-                page.wait_for_selector(
-                    "#kp-notebook-annotations",
+                if page is None:
+                    page = await context.new_page()
+                await page.goto(book_url(book["asin"]), wait_until="domcontentloaded")
+                await page.wait_for_selector(
+                    "#kp-notebook-annotations .a-row, "
+                    "#kp-notebook-annotations .no-annotations",
                     timeout=15000,
                 )
             except Exception:
-                print(f"    Timeout waiting for annotations, skipping")
+                print(f"    {title}: timeout waiting for annotations, skipping")
                 continue
 
-            # Small pause for content to fully render
-            time.sleep(1)
+            try:
+                highlights = await extract_highlights(page)
+            except Exception as e:
+                print(f"    {title}: failed to extract highlights ({e}), skipping")
+                continue
 
-            highlights = extract_highlights(page)
+        if not highlights:
+            print(f"    {title}: no highlights found, skipping")
+            continue
+
+        # Write on a thread so disk I/O overlaps with the other workers' fetches
+        loop = asyncio.get_running_loop()
+        try:
+            filepath = await loop.run_in_executor(
+                writer, write_markdown, title, author, highlights, NOTES_DIR,
+            )
+        except Exception as e:
+            print(f"    {title}: failed to write markdown ({e}), skipping")
+            continue
+        print(f"    Wrote {len(highlights)} highlights to {filepath.name}")
+        counts["exported"] += 1
+        exported_index[book["asin"]] = time.time()
+        try:
+            await loop.run_in_executor(
+                index_writer, save_exported_index, dict(exported_index), EXPORTED_INDEX_FILE,
+            )
+        except Exception as e:
+            print(f"    {title}: failed to update {EXPORTED_INDEX_FILE.name} ({e})")
+    if page is not None:
+        await page.close()
+
+
+async def export(args, exported_index: dict[str, float]) -> dict:
+    """Scrape the library and export books, returning exported/skipped counts."""
+    counts = {"exported": 0, "skipped": 0}
+
+    async with async_playwright() as p:
+        context = await open_profile(p, chrome=args.chrome)
+
+        # Reuse the cached book list when a plain HTTP fetch of the notebook
+        # shows the same ASINs, avoiding a full render of the sidebar.
+        books = load_books_cache(BOOKS_CACHE_FILE)
+        if books and await fetch_library_asins(context.request) == [b["asin"] for b in books]:
+            print("Library unchanged since last run, using cached book list")
+        else:
+            page = await context.new_page()
+
+            print("Navigating to Kindle notebook...")
+            await page.goto(NOTEBOOK_URL, wait_until="networkidle")
+
+            # Check if we got redirected to login
+            if "signin" in page.url or "ap/signin" in page.url:
+                print("Session expired. Please re-run auth_setup.py to log in again.")
+                await context.close()
+                raise SystemExit(1)
+
+            books = await extract_books(page)
+            await page.close()
+            save_books_cache(books, BOOKS_CACHE_FILE)
+        print(f"Found {len(books)} books")
 
-            if not highlights:
-                print(f"    No highlights found, skipping")
+        queue = asyncio.Queue()
+        for i, book in enumerate(books):
+            if not args.force and book["asin"] in exported_index:
+                counts["skipped"] += 1
                 continue
+            queue.put_nowait((i, book))
+
+        # Workers each drive their own page in the shared profile context
+        workers = max(1, min(args.workers, queue.qsize()))
+        with ThreadPoolExecutor(max_workers=workers) as writer, \
+                ThreadPoolExecutor(max_workers=1) as index_writer:
+            await asyncio.gather(*(
+                export_worker(
+                    context, queue, len(books), counts, exported_index, writer, index_writer,
+                )
+                for _ in range(workers)
+            ))
+
+        await context.close()
+
+    return counts
 
-            filepath = write_markdown(title, author, highlights, NOTES_DIR)
-            print(f"    Wrote {len(highlights)} highlights to {filepath.name}")
-            exported += 1
 
-        browser.close()
+def main():
+    parser = argparse.ArgumentParser(description="Export Kindle highlights to markdown")
+    parser.add_argument(
+        "--force", action="store_true",
+        help="Re-export all books (default: skip books that were already exported)",
+    )
+    parser.add_argument(
+        "--chrome", action="store_true",
+        help="Use system Chrome instead of Playwright's bundled Chromium",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=DEFAULT_WORKERS,
+        help=f"Number of books to scrape concurrently (default: {DEFAULT_WORKERS})",
+    )
+    args = parser.parse_args()
+
+    if not PROFILE_DIR.exists():
+        print(f"Browser profile not found: {PROFILE_DIR}")
+        print("Run auth_setup.py first to log in and save your session.")
+        raise SystemExit(1)
+
+    NOTES_DIR.mkdir(exist_ok=True)
+    exported_index = load_exported_index(EXPORTED_INDEX_FILE)
+
+    counts = asyncio.run(export(args, exported_index))
 
-    print(f"\nDone: {exported} exported, {skipped} skipped (already exist)")
+    print(f"\nDone: {counts['exported']} exported, {counts['skipped']} skipped (already exported)")
 
 
 if __name__ == "__main__":
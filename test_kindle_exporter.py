@@ -0,0 +1,104 @@
+"""Tests for the pure parsing/rendering helpers in kindle_exporter."""
+
+import itertools
+
+import pytest
+
+from kindle_exporter import _parse_header, parse_annotations, write_markdown
+
+ROWS = """
+<div class="a-row a-spacing-base">
+  <span id="annotationHighlightHeader">Yellow highlight | Page: 56, Location: 1,234</span>
+  <span id="highlight">line one<br>line two</span>
+  <span id="note"></span>
+</div>
+<div class="a-row a-spacing-base">
+  <span id="annotationNoteHeader">Note | Location: 9</span>
+  <span id="highlight"></span>
+  <span id="note">
+      my note
+  </span>
+</div>
+"""
+
+EXPECTED = [
+    {"text": "line one\nline two", "note": "", "location": "1,234", "page": "56",
+     "color": "Yellow"},
+    {"text": "", "note": "my note", "location": "9", "page": "", "color": ""},
+]
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("Yellow highlight | Page: 56, Location: 1,234", ("Yellow", "56", "1,234")),
+    ("Yellow highlight | Location: 1234", ("Yellow", "", "1234")),
+    ("Blue highlight | Page: ix", ("Blue", "ix", "")),
+    ("Note | Location: 12", ("", "", "12")),
+    ("", ("", "", "")),
+])
+def test_parse_header(header, expected):
+    assert _parse_header(header) == expected
+
+
+def test_parse_annotations_page():
+    html = (
+        f'<html><body><div id="kp-notebook-annotations">{ROWS}</div>'
+        '<input class="kp-notebook-annotations-next-page-start" value="TOKEN">'
+        '<input class="kp-notebook-content-limit-state" value="STATE">'
+        '</body></html>'
+    )
+    assert parse_annotations(html) == (EXPECTED, "TOKEN", "STATE")
+
+
+def test_parse_annotations_fragment():
+    assert parse_annotations(ROWS) == (EXPECTED, "", "")
+
+
+def test_parse_annotations_empty_state():
+    html = '<div id="kp-notebook-annotations"><div class="no-annotations"></div></div>'
+    assert parse_annotations(html) == ([], "", "")
+
+
+def test_parse_annotations_rejects_signin_page():
+    html = '<html><body><form name="signIn"><input name="email"></form></body></html>'
+    with pytest.raises(ValueError):
+        parse_annotations(html)
+
+
+def _baseline_write_markdown(book_title, author, highlights, filepath):
+    """The original line-by-line renderer, kept as the reference output."""
+    lines = [f"# {book_title}", f"**Author:** {author}", "", "---", ""]
+    for hl in highlights:
+        if hl["text"]:
+            lines.append(f"> {hl['text']}")
+            lines.append("")
+        if hl["note"]:
+            lines.append(f"**Note:** {hl['note']}")
+        meta_parts = []
+        if hl["location"]:
+            meta_parts.append(f"**Location:** {hl['location']}")
+        if hl["page"]:
+            meta_parts.append(f"**Page:** {hl['page']}")
+        if meta_parts:
+            lines.append(" | ".join(meta_parts))
+        lines.append("")
+        lines.append("---")
+        lines.append("")
+    filepath.write_text("\n".join(lines), encoding="utf-8")
+
+
+def test_write_markdown_matches_baseline(tmp_path):
+    shapes = [
+        {"text": text, "note": note, "location": location, "page": page, "color": ""}
+        for text, note, location, page in itertools.product(
+            ["", "a {braced} quote"], ["", "a note"], ["", "1,234"], ["", "56"],
+        )
+    ]
+    for n in range(3):
+        for highlights in itertools.combinations(shapes, n):
+            expected = tmp_path / "expected.md"
+            _baseline_write_markdown("Title: Sub", "Author", list(highlights), expected)
+            out_dir = tmp_path / "out"
+            out_dir.mkdir(exist_ok=True)
+            actual = write_markdown("Title: Sub", "Author", list(highlights), out_dir)
+            assert actual.name == "Title Sub - Author.md"
+            assert actual.read_text(encoding="utf-8") == expected.read_text(encoding="utf-8")